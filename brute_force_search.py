@@ -0,0 +1,38 @@
+# Third-party data handling and analysis
+import numpy as np
+
+# Shared geometry helpers
+from kdtree_search import METERS_PER_MILE, chord_length, point_segment_distances, to_cartesian
+
+
+def find_fuel_stations_brute_force(route_points, fuel_locations, distance_miles=1.0):
+    """Find fuel stations within specified distance of route by checking every station against every segment
+
+    Intended for small searches, where building a spatial index or projecting and buffering the route costs
+    more than computing the full station-by-segment distance matrix in one vectorized pass.
+
+    Args:
+        route_points (RoutePoints): Route coordinates
+        fuel_locations (list): List of dictionaries containing fuel station data
+        distance_miles (float): Search radius in miles (default: 1.0)
+
+    Returns:
+        list: Fuel stations within specified distance of route
+    """
+    distance = chord_length(distance_miles * METERS_PER_MILE)
+
+    # Convert route and fuel locations to the same Cartesian coordinates as the KDTree search
+    station_latlon = np.array([[loc['lat'], loc['lon']] for loc in fuel_locations], dtype=float).reshape(-1, 2)
+    station_xyz = to_cartesian(station_latlon[:, 0], station_latlon[:, 1])
+    route_xyz = to_cartesian(route_points.lat, route_points.lng)
+
+    # Split route into segments (a single point becomes a zero-length segment)
+    if len(route_xyz) == 1:
+        route_xyz = np.vstack((route_xyz, route_xyz))
+
+    # Distance from every station to every segment, shape (stations, segments)
+    distances = point_segment_distances(station_xyz[:, None, :], route_xyz[None, :-1], route_xyz[None, 1:])
+    nearby_indices = np.flatnonzero((distances <= distance).any(axis=1))
+
+    # Convert indices to list of stations
+    return [fuel_locations[i] for i in nearby_indices]
@@ -1,9 +1,21 @@
+# Standard library imports
+from threading import Lock
+
+import numpy as np
+import pandas as pd
 import pymongo
 from tabulate import tabulate
 
+MAX_POOL_SIZE = 50
+SERVER_SELECTION_TIMEOUT_MS = 5000
+
+# MongoDB clients by connection URL, reused so each URL pays the connection handshake only once
+_clients = {}
+_clients_lock = Lock()
+
 
 def connect_to_mongodb(db_url, db_name):
-    """Establish MongoDB connection
+    """Establish MongoDB connection, reusing an existing client for the same URL
 
     Args:
         db_url (str): MongoDB connection URL
@@ -12,82 +24,117 @@ def connect_to_mongodb(db_url, db_name):
     Returns:
         pymongo.database.Database: MongoDB database connection
     """
-    client = pymongo.MongoClient(db_url)
+    with _clients_lock:
+        client = _clients.get(db_url)
+        if client is None:
+            client = pymongo.MongoClient(
+                db_url,
+                maxPoolSize=MAX_POOL_SIZE,
+                serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS
+            )
+            _clients[db_url] = client
     return client[db_name]
 
 
+def ensure_indexes(db):
+    """Create the indexes used by the fuel location query (no-op if they already exist)
+
+    Index creation is best-effort: with read-only credentials a warning is printed and the query still runs,
+    just without the indexes.
+
+    Args:
+        db (pymongo.database.Database): MongoDB database connection
+    """
+    try:
+        # Supports the company name $in filter
+        db.fuelLocations.create_index("fuelStationCompanyName")
+        # Supports the $lookup from fuelLocations into fuelPrices
+        db.fuelPrices.create_index("location_id")
+    except pymongo.errors.OperationFailure as e:
+        print(f"Warning: could not create MongoDB indexes, queries may be slower: {e}")
+
+
 def get_fuel_locations(db):
-    """Query MongoDB for Loves/Pilot fuel locations"""
-    fuel_locations = db.fuelLocations.find(
+    """Query MongoDB for Loves/Pilot fuel locations joined with their retail fuel prices
+
+    The join against fuelPrices runs server-side via $lookup, so only the merged documents are transferred.
+    """
+    fuel_locations = db.fuelLocations.aggregate([
         {
-            "fuelStationCompanyName": {
-                "$in": ["Loves", "Pilot"]
+            "$match": {
+                "fuelStationCompanyName": {
+                    "$in": ["Loves", "Pilot"]
+                }
             }
         },
         {
-            "address": 1,
-            "city": 1,
-            "lat": 1,
-            "lon": 1,
-            "locationId": 1,
-            "state": 1,
-            "zipCode": 1,
-            "_id": 1  # Include the MongoDB _id field
+            "$lookup": {
+                "from": "fuelPrices",
+                # Prices reference locations by MongoDB _id, stored either as an ObjectId or as its string form
+                "let": {
+                    "location_id": "$_id",
+                    "location_id_str": {"$toString": "$_id"}
+                },
+                "pipeline": [
+                    {
+                        "$match": {
+                            "$expr": {
+                                "$or": [
+                                    {"$eq": ["$location_id", "$$location_id"]},
+                                    {"$eq": ["$location_id", "$$location_id_str"]}
+                                ]
+                            }
+                        }
+                    },
+                    {"$project": {"dieselPrice": 1, "_id": 0}}
+                ],
+                "as": "prices"
+            }
+        },
+        {
+            "$project": {
+                "address": 1,
+                "city": 1,
+                "lat": 1,
+                "lon": 1,
+                "locationId": 1,
+                "state": 1,
+                "zipCode": 1,
+                "dieselPrice": {
+                    "$ifNull": [{"$arrayElemAt": ["$prices.dieselPrice", 0]}, "N/A"]
+                },
+                "_id": 0
+            }
         }
-    )
+    ])
     return list(fuel_locations)
 
 
-def get_retail_fuel_prices(db):
-    """Query MongoDB for retail fuel prices."""
-    fuel_prices = db.fuelPrices.find(
-        {},
+def format_fuel_locations(fuel_locations):
+    """Format fuel locations into the flat structure used by the search methods"""
+    return [
         {
-            "location_id": 1,
-            "dieselPrice": 1,
-            "_id": 0
-        }
-    )
-    return list(fuel_prices)
-
-
-def merge_fuel_data(fuel_locations, fuel_prices):
-    """Merge fuel locations with their corresponding prices"""
-    # Create price lookup dictionary using MongoDB _id
-    price_lookup = {str(price['location_id']): price['dieselPrice']
-                    for price in fuel_prices}
-
-    # Merge data
-    merged_locations = []
-    for location in fuel_locations:
-        location_data = {
             'locationId': location['locationId'],
             'lat': location['lat'],
             'lon': location['lon'],
             'address': f"{location['address']}, {location['city']}, {location['state']} {location['zipCode']}",
-            'dieselPrice': price_lookup.get(str(location['_id']), 'N/A')  # Use MongoDB _id for lookup
+            'dieselPrice': location['dieselPrice']
         }
-        merged_locations.append(location_data)
-
-    return merged_locations
+        for location in fuel_locations
+    ]
 
 
 def validate_fuel_locations(formatted_locations):
     """Validate coordinates of formatted fuel locations and separate valid from invalid entries."""
-    valid_locations = []
-    invalid_locations = []
-
-    for location in formatted_locations:
-        try:
-            lat = float(location['lat'])
-            lon = float(location['lon'])
-            if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-                invalid_locations.append(location)
-                continue
-            valid_locations.append(location)
-        except (ValueError, TypeError, KeyError):
-            invalid_locations.append(location)
-            continue
+    # Coerce coordinates to floats; missing or non-numeric values become NaN and fail the range checks
+    lats = pd.to_numeric(pd.Series([loc.get('lat') for loc in formatted_locations], dtype=object),
+                         errors='coerce').to_numpy(dtype=float)
+    lons = pd.to_numeric(pd.Series([loc.get('lon') for loc in formatted_locations], dtype=object),
+                         errors='coerce').to_numpy(dtype=float)
+    valid_mask = (np.isfinite(lats) & np.isfinite(lons) & (np.abs(lats) <= 90) & (np.abs(lons) <= 180))
+
+    valid_locations = [formatted_locations[i] for i in np.flatnonzero(valid_mask)]
+    invalid_locations = [formatted_locations[i] for i in np.flatnonzero(~valid_mask)]
 
     # Print validation results
     print("\nFuel Location Validation Results:")
@@ -119,13 +166,13 @@ def get_fuel_locations_with_prices(db_url, db_name):
     """
     # Connect to database
     db = connect_to_mongodb(db_url, db_name)
+    ensure_indexes(db)
 
-    # Get raw data from database
+    # Get fuel locations with their prices already joined by the database
     fuel_locations = get_fuel_locations(db)
-    fuel_prices = get_retail_fuel_prices(db)
 
-    # Merge and validate data
-    merged_locations = merge_fuel_data(fuel_locations, fuel_prices)
-    valid_locations, _ = validate_fuel_locations(merged_locations)
+    # Format and validate data
+    formatted_locations = format_fuel_locations(fuel_locations)
+    valid_locations, _ = validate_fuel_locations(formatted_locations)
 
     return valid_locations
@@ -1,81 +1,169 @@
+# Standard library imports
+from itertools import chain
+
 # Third-party data handling and analysis
 import numpy as np
 from scipy.spatial import cKDTree
-from scipy.interpolate import interp1d
+
+METERS_PER_MILE = 1609.34
+EARTH_RADIUS_METERS = 6371000
+
+# Most recently built station index, reused while the station set is unchanged
+_station_index = None
 
 
-def interpolate_route_points_scipy(route_points, max_distance=0.01):
-    """Interpolate route points to ensure maximum distance between points.
+def to_cartesian(lat, lon):
+    """Convert coordinates to 3D Cartesian points on a spherical Earth.
+
+    Straight-line distances between the points increase monotonically with great-circle distance, so a
+    single KDTree built on them works for routes anywhere on the globe.
 
     Args:
-        route_points (list): List of dictionaries containing route points
-        max_distance (float): Maximum distance between points in degrees
+        lat (np.ndarray): Latitudes in degrees
+        lon (np.ndarray): Longitudes in degrees
 
     Returns:
-        list: Interpolated route points
+        np.ndarray: (N, 3) array of x/y/z coordinates in meters
     """
-    # Extract coordinates
-    coords = np.array([[p['lat'], p['lng']] for p in route_points])
+    lat = np.radians(lat)
+    lon = np.radians(lon)
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_METERS * np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
 
-    # Calculate cumulative distance along route
-    diffs = np.diff(coords, axis=0)
-    segment_lengths = np.sqrt(np.sum(diffs**2, axis=1))
-    cum_distance = np.concatenate(([0], np.cumsum(segment_lengths)))
 
-    # Create interpolation functions for lat and lon
-    lat_interp = interp1d(cum_distance, coords[:, 0])
-    lon_interp = interp1d(cum_distance, coords[:, 1])
+def chord_length(arc_meters):
+    """Convert a great-circle distance in meters to the straight-line distance through the Earth"""
+    return 2 * EARTH_RADIUS_METERS * np.sin(arc_meters / (2 * EARTH_RADIUS_METERS))
 
-    # Calculate number of points needed
-    total_distance = cum_distance[-1]
-    num_points = int(np.ceil(total_distance / max_distance)) + 1
 
-    # Generate evenly spaced points
-    distances = np.linspace(0, total_distance, num_points)
+def point_segment_distances(points, seg_start, seg_end):
+    """Calculate the distance from each point to its paired line segment.
 
-    # Interpolate new points
-    new_points = [
-        {'lat': lat_interp(d), 'lng': lon_interp(d)}
-        for d in distances
-    ]
+    The inputs broadcast against each other over all but the last (coordinate) axis, so passing points with
+    shape (N, 1, D) and segments with shape (1, M, D) gives the full (N, M) distance matrix.
 
-    return new_points
+    Args:
+        points (np.ndarray): (..., D) array of points
+        seg_start (np.ndarray): (..., D) array of segment start points
+        seg_end (np.ndarray): (..., D) array of segment end points
 
+    Returns:
+        np.ndarray: (...) array of distances, in the same units as the inputs
+    """
+    seg = seg_end - seg_start
+    rel = points - seg_start
+    seg_len_sq = np.einsum('...j,...j->...', seg, seg)
 
-def find_fuel_stations_kdtree(route_points, fuel_locations, distance_miles=1.0):
-    """Find fuel stations within specified distance of route using optimized KDTree search
+    # Position of the closest point along each segment, clamped to the segment ends
+    t = np.einsum('...j,...j->...', rel, seg) / np.where(seg_len_sq > 0, seg_len_sq, 1.0)
+    t = np.clip(t, 0.0, 1.0)
+
+    return np.linalg.norm(rel - t[..., None] * seg, axis=-1)
+
+
+class StationIndex:
+    """KDTree index over fuel station locations that can be reused across route queries.
+
+    Attributes:
+        locations (list): Fuel station dictionaries, in index order
+        coords (np.ndarray): (N, 3) Cartesian station coordinates in meters
+        tree (cKDTree): KDTree built on coords
+        key (int): Hash of the station ids and coordinates the index was built from
+    """
+
+    def __init__(self, fuel_locations, key=None):
+        self.locations = fuel_locations
+        self.key = self.make_key(fuel_locations) if key is None else key
+
+        latlon = np.array([[loc['lat'], loc['lon']] for loc in fuel_locations], dtype=float).reshape(-1, 2)
+        self.coords = to_cartesian(latlon[:, 0], latlon[:, 1])
+        self.tree = cKDTree(self.coords)
+
+    @staticmethod
+    def make_key(fuel_locations):
+        """Hash the ids and coordinates of fuel_locations to detect when the index needs rebuilding"""
+        return hash(tuple((loc['locationId'], loc['lat'], loc['lon']) for loc in fuel_locations))
+
+    def query_indices(self, route_points, distance_miles=1.0):
+        """Find the indices of fuel stations within specified distance of route
+
+        The KDTree only supplies candidate stations for each route segment; the exact point-to-segment
+        distance decides which are within range.
+
+        Args:
+            route_points (RoutePoints): Route coordinates
+            distance_miles (float): Search radius in miles (default: 1.0)
+
+        Returns:
+            np.ndarray: Sorted indices into the station list the index was built from
+        """
+        distance = chord_length(distance_miles * METERS_PER_MILE)
+
+        route_xyz = to_cartesian(route_points.lat, route_points.lng)
+
+        # Split route into segments (a single point becomes a zero-length segment)
+        if len(route_xyz) == 1:
+            route_xyz = np.vstack((route_xyz, route_xyz))
+        seg_start = route_xyz[:-1]
+        seg_end = route_xyz[1:]
+
+        # Any station within range of a segment lies within half its length plus the radius of its midpoint.
+        # Query all segments at once, spreading the work across all CPU cores
+        midpoints = (seg_start + seg_end) / 2
+        half_lengths = np.linalg.norm(seg_end - seg_start, axis=1) / 2
+        candidates = self.tree.query_ball_point(midpoints, half_lengths + distance, workers=-1, return_sorted=False)
+
+        # Flatten candidates into (segment, station) pairs
+        counts = np.fromiter(map(len, candidates), dtype=np.intp, count=len(candidates))
+        station_idx = np.fromiter(chain.from_iterable(candidates), dtype=np.intp, count=counts.sum())
+        segment_idx = np.repeat(np.arange(len(candidates)), counts)
+
+        # Keep stations whose exact distance to the segment is within the radius
+        distances = point_segment_distances(self.coords[station_idx], seg_start[segment_idx], seg_end[segment_idx])
+        return np.unique(station_idx[distances <= distance])
+
+    def query_route(self, route_points, distance_miles=1.0):
+        """Find fuel stations within specified distance of route
+
+        Args:
+            route_points (RoutePoints): Route coordinates
+            distance_miles (float): Search radius in miles (default: 1.0)
+
+        Returns:
+            list: Fuel stations within specified distance of route
+        """
+        return [self.locations[i] for i in self.query_indices(route_points, distance_miles)]
+
+
+def get_station_index(fuel_locations):
+    """Get a StationIndex for fuel_locations, reusing the cached index if the stations are unchanged
 
     Args:
-        route_points (list): List of dictionaries containing route points
         fuel_locations (list): List of dictionaries containing fuel station data
-        distance_miles (float): Search radius in miles (default: 1.0)
 
     Returns:
-        list: Fuel stations within specified distance of route
+        StationIndex: Index over fuel_locations
     """
-    # Convert distance to degrees (approximate)
-    distance_degrees = distance_miles / 69.0  # 69 miles per degree of lat/lon
+    global _station_index
 
-    # Convert fuel locations to numpy array for KDTree
-    coords = np.array([[loc['lat'], loc['lon']] for loc in fuel_locations])
+    key = StationIndex.make_key(fuel_locations)
+    if _station_index is None or _station_index.key != key:
+        _station_index = StationIndex(fuel_locations, key)
+    return _station_index
 
-    # Create KDTree from coordinates
-    tree = cKDTree(coords)
 
-    # Interpolate route points using scipy method
-    interpolated_points = interpolate_route_points_scipy(route_points, max_distance=distance_degrees/2)
-
-    # Convert interpolated points to numpy array for vectorized operations
-    route_coords = np.array([[p['lat'], p['lng']] for p in interpolated_points])
-
-    # Use batch processing for query_ball_point
-    batch_size = 1000  # Adjust based on memory constraints
-    nearby_indices = set()
+def find_fuel_stations_kdtree(route_points, fuel_locations, distance_miles=1.0):
+    """Find fuel stations within specified distance of route using optimized KDTree search
 
-    for i in range(0, len(route_coords), batch_size):
-        batch = route_coords[i:i + batch_size]
-        batch_indices = tree.query_ball_point(batch, distance_degrees)
-        nearby_indices.update(*batch_indices)
+    Args:
+        route_points (RoutePoints): Route coordinates
+        fuel_locations (list): List of dictionaries containing fuel station data
+        distance_miles (float): Search radius in miles (default: 1.0)
 
-    # Convert indices to list of stations
-    return [fuel_locations[i] for i in sorted(nearby_indices)]
+    Returns:
+        list: Fuel stations within specified distance of route
+    """
+    # The cached index may hold an older list of the same stations (e.g. with outdated prices), so only its
+    # indices are used and the stations are taken from the caller's list
+    nearby_indices = get_station_index(fuel_locations).query_indices(route_points, distance_miles)
+    return [fuel_locations[i] for i in nearby_indices]
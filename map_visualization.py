@@ -1,4 +1,22 @@
+import numpy as np
 import folium
+from folium.plugins import FastMarkerCluster
+
+# In-browser marker factories for FastMarkerCluster; each is called with one data row
+ROUTE_POINT_CALLBACK = """function (row) {{
+    return L.circleMarker(new L.LatLng(row[0], row[1]), {{
+        radius: {radius}, color: '{color}', fill: true, fillOpacity: 1.0
+    }});
+}}"""
+
+STATION_CALLBACK = """function (row) {{
+    var icon = L.AwesomeMarkers.icon({{
+        icon: 'gas', prefix: 'fa', markerColor: '{color}', iconColor: 'white'
+    }});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {{icon: icon}});
+    marker.bindPopup(row[2], {{maxWidth: 300}});
+    return marker;
+}}"""
 
 
 def add_route_with_points(m, route_coords, line_color='blue', line_opacity=0.8, dot_color='blue', dot_radius=4):
@@ -11,29 +29,42 @@ def add_route_with_points(m, route_coords, line_color='blue', line_opacity=0.8,
         opacity=line_opacity
     ).add_to(m)
 
-    # Add dots for each point
-    for lat, lon in route_coords:
-        folium.CircleMarker(
-            location=[lat, lon],
-            radius=dot_radius,
-            color=dot_color,
-            fill=True,
-            fillOpacity=1.0
-        ).add_to(m)
+    # Add dots for each point, created in the browser from a single data array.
+    # Clustering is disabled past the world view so every dot stays visible along the line.
+    FastMarkerCluster(
+        route_coords,
+        callback=ROUTE_POINT_CALLBACK.format(radius=dot_radius, color=dot_color),
+        disable_clustering_at_zoom=1
+    ).add_to(m)
+
+
+def add_station_markers(m, stations, color):
+    """Add fuel station markers with popups to map"""
+    data = [
+        [
+            float(station['lat']),
+            float(station['lon']),
+            f"""
+                <b>Location ID:</b> {station['locationId']}<br>
+                <b>Address:</b> {station['address']}<br>
+                <b>Diesel Price:</b> ${station.get('dieselPrice', 'N/A')}
+            """
+        ]
+        for station in stations
+    ]
+    FastMarkerCluster(data, callback=STATION_CALLBACK.format(color=color)).add_to(m)
 
 
 def create_route_map(
     route_points, start_name, end_name, nearby_stations=None, all_stations=None, filename='route_map.html'
 ):
     """Create and save route map"""
-    # Extract coordinates
-    latitudes = [point['lat'] for point in route_points]
-    longitudes = [point['lng'] for point in route_points]
-    route_coords = [[point['lat'], point['lng']] for point in route_points]
+    # Extract coordinates into one (N, 2) array used for both the map center and the route layers
+    coords = np.column_stack((route_points.lat, route_points.lng))
+    route_coords = coords.tolist()
 
     # Create map
-    center_lat = sum(latitudes) / len(latitudes)
-    center_lng = sum(longitudes) / len(longitudes)
+    center_lat, center_lng = coords.mean(axis=0).tolist()
     m = folium.Map(location=[center_lat, center_lng], zoom_start=5)
 
     # Add route and points
@@ -48,35 +79,12 @@ def create_route_map(
 
     # Add all fuel stations not near the route as red markers
     if all_stations:
-        for station in all_stations:
-            # Skip if we'll add it later as a nearby station
-            if station['locationId'] in nearby_station_ids:
-                continue
-
-            popup_content = f"""
-                <b>Location ID:</b> {station['locationId']}<br>
-                <b>Address:</b> {station['address']}<br>
-                <b>Diesel Price:</b> ${station.get('dieselPrice', 'N/A')}
-            """
-            folium.Marker(
-                location=[float(station['lat']), float(station['lon'])],
-                popup=folium.Popup(popup_content, max_width=300),
-                icon=folium.Icon(color='red', icon='gas', prefix='fa')
-            ).add_to(m)
+        other_stations = [station for station in all_stations if station['locationId'] not in nearby_station_ids]
+        add_station_markers(m, other_stations, 'red')
 
     # Add nearby stations with green icons
     if nearby_stations:
-        for station in nearby_stations:
-            popup_content = f"""
-                <b>Location ID:</b> {station['locationId']}<br>
-                <b>Address:</b> {station['address']}<br>
-                <b>Diesel Price:</b> ${station.get('dieselPrice', 'N/A')}
-            """
-            folium.Marker(
-                location=[float(station['lat']), float(station['lon'])],
-                popup=folium.Popup(popup_content, max_width=300),
-                icon=folium.Icon(color='green', icon='gas', prefix='fa')
-            ).add_to(m)
+        add_station_markers(m, nearby_stations, 'green')
 
     # Save map
     m.save(filename)
@@ -1,42 +1,70 @@
-from math import radians, sin, cos, sqrt, atan2
+from dataclasses import dataclass
+
 import numpy as np
+from numba import njit
 from tabulate import tabulate
-from shapely.geometry import LineString
 from googlemaps.convert import decode_polyline
 
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points using Haversine formula"""
-    R = 6371  # Earth's radius in kilometers
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+@dataclass
+class RoutePoints:
+    """Route coordinates stored as parallel arrays
+
+    Attributes:
+        lat (np.ndarray): Latitudes in degrees
+        lng (np.ndarray): Longitudes in degrees
+    """
+    lat: np.ndarray
+    lng: np.ndarray
+
+    @classmethod
+    def from_dicts(cls, points):
+        """Build RoutePoints from a list of dictionaries with 'lat' and 'lng' keys"""
+        lat = np.fromiter((p['lat'] for p in points), dtype=np.float64, count=len(points))
+        lng = np.fromiter((p['lng'] for p in points), dtype=np.float64, count=len(points))
+        return cls(lat, lng)
+
+    def __len__(self):
+        return len(self.lat)
+
+
+def haversine_vector(lat1, lon1, lat2, lon2):
+    """Calculate distances (in meters) between points using the Haversine formula
+
+    Inputs may be scalars or NumPy arrays of coordinates in degrees; arrays are broadcast against each other.
+    """
+    R = 6371000  # Earth's radius in meters
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
     dlat = lat2 - lat1
     dlon = lon2 - lon1
 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    return R * c * 1000  # Convert to meters
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    """Calculate distance (in meters) between two points using Haversine formula"""
+    return float(haversine_vector(lat1, lon1, lat2, lon2))
 
 
 def analyze_route_spacing(route_points, print_analysis=True):
     """Analyze spacing between route points
 
     Args:
-        route_points (list): List of route points
+        route_points (RoutePoints): Route coordinates
         print_analysis (bool): Whether to print the analysis table (default: True)
     """
-    distances = []
-    for i in range(len(route_points)-1):
-        point1 = route_points[i]
-        point2 = route_points[i+1]
-        dist = calculate_distance(point1['lat'], point1['lng'], point2['lat'], point2['lng'])
-        distances.append(dist)
-    total_distance = sum(distances)
+    # Compute all segment distances in a single vectorized pass
+    lat = route_points.lat
+    lng = route_points.lng
+    distances = haversine_vector(lat[:-1], lng[:-1], lat[1:], lng[1:])
+    total_distance = distances.sum()
 
     analysis = {
         'Total Points': len(route_points),
         'Avg Distance (m)': round(np.mean(distances), 2),
-        'Min Distance (m)': round(min(distances), 2),
-        'Max Distance (m)': round(max(distances), 2),
+        'Min Distance (m)': round(np.min(distances), 2),
+        'Max Distance (m)': round(np.max(distances), 2),
         'Std Dev (m)': round(np.std(distances), 2),
         'Total Distance (km)': round(total_distance / 1000, 2),
         'Total Distance (mi)': round(total_distance / 1609.34, 2),
@@ -50,6 +78,67 @@ def analyze_route_spacing(route_points, print_analysis=True):
     return analysis
 
 
+@njit(cache=True)
+def _simplify_mask(x, y, tolerance):
+    """Simplify a polyline with the Ramer-Douglas-Peucker algorithm
+
+    Args:
+        x (np.ndarray): Point x coordinates
+        y (np.ndarray): Point y coordinates
+        tolerance (float): Maximum distance a removed point may be from the simplified line
+
+    Returns:
+        np.ndarray: Boolean mask of the points to keep
+    """
+    n = x.shape[0]
+    keep = np.zeros(n, dtype=np.bool_)
+    if n == 0:
+        return keep
+    keep[0] = True
+    keep[n - 1] = True
+
+    # Stack of (start, end) index ranges still to be simplified
+    stack = np.empty((n, 2), dtype=np.int64)
+    stack[0, 0] = 0
+    stack[0, 1] = n - 1
+    top = 1
+    tolerance_sq = tolerance * tolerance
+
+    while top > 0:
+        top -= 1
+        start = stack[top, 0]
+        end = stack[top, 1]
+
+        # Find the point farthest from the segment between start and end
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        seg_len_sq = dx * dx + dy * dy
+        max_dist_sq = -1.0
+        index = start
+        for i in range(start + 1, end):
+            px = x[i] - x[start]
+            py = y[i] - y[start]
+            if seg_len_sq > 0:
+                t = min(max((px * dx + py * dy) / seg_len_sq, 0.0), 1.0)
+                px -= t * dx
+                py -= t * dy
+            dist_sq = px * px + py * py
+            if dist_sq > max_dist_sq:
+                max_dist_sq = dist_sq
+                index = i
+
+        # Keep it and simplify both halves if it deviates too far from the segment
+        if max_dist_sq > tolerance_sq:
+            keep[index] = True
+            stack[top, 0] = start
+            stack[top, 1] = index
+            stack[top + 1, 0] = index
+            stack[top + 1, 1] = end
+            top += 2
+
+    return keep
+
+
 def get_route_points(gmaps_client, origin, destination, detailed=False, simplify_tolerance=0.0002):
     """Get route points from Google Maps API
 
@@ -63,16 +152,14 @@ def get_route_points(gmaps_client, origin, destination, detailed=False, simplify
                                 route shape while still being accurate to within 22m.
 
     Returns:
-        list: Route points, each containing:
-            - lat: Latitude coordinate
-            - lng: Longitude coordinate
+        RoutePoints: Route coordinates (lat and lng arrays)
     """
     directions = gmaps_client.directions(origin, destination)
 
     if not detailed:
         # Return simplified overview route
         polyline = directions[0]['overview_polyline']['points']
-        return decode_polyline(polyline)
+        return RoutePoints.from_dicts(decode_polyline(polyline))
 
     # Get detailed route with precise route points
     all_points = []
@@ -80,13 +167,10 @@ def get_route_points(gmaps_client, origin, destination, detailed=False, simplify
         for step in leg['steps']:
             step_points = decode_polyline(step['polyline']['points'])
             all_points.extend(step_points)
+    route_points = RoutePoints.from_dicts(all_points)
 
     if simplify_tolerance:
-        original_count = len(all_points)
-
-        # Convert points to LineString
-        coords = [(p['lng'], p['lat']) for p in all_points]
-        line = LineString(coords)
+        original_count = len(route_points)
 
         print(f"\nSimplifying route from {original_count} points...")
         print(f"Using tolerance of {simplify_tolerance} degrees (≈{simplify_tolerance * 111000:.0f}m)")
@@ -94,17 +178,15 @@ def get_route_points(gmaps_client, origin, destination, detailed=False, simplify
         print("route will be removed while preserving the overall route shape.")
 
         # Simplify the line
-        simplified = line.simplify(tolerance=simplify_tolerance, preserve_topology=True)
-
-        # Convert back to points format
-        simplified_points = [{'lat': y, 'lng': x} for x, y in simplified.coords]
+        keep = _simplify_mask(route_points.lng, route_points.lat, simplify_tolerance)
+        simplified_points = RoutePoints(lat=route_points.lat[keep], lng=route_points.lng[keep])
 
         print(f"Route simplified to {len(simplified_points)} points")
         print(f"Reduction: {(1 - len(simplified_points)/original_count)*100:.1f}%")
 
         return simplified_points
 
-    return all_points
+    return route_points
 
 
 def validate_address(gmaps_client, location):